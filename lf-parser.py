@@ -18,8 +18,9 @@ When decoding, each 16-byte record is printed as:
 
 """
 
-import sys, os, struct, argparse
-from typing import List
+import sys, os, re, mmap, stat, struct, argparse, tempfile
+from contextlib import contextmanager
+from typing import List, TextIO
 
 # COLUMN where "# raw:" comments begin
 RAW_COLUMN = 60
@@ -77,6 +78,11 @@ CMD_ID_TO_NAME = {
     127: "Padding",
 }
 
+# Name for every possible cmd_id (byte15 & 0x7F), indexed directly by the decoder
+CMD_NAMES = tuple(CMD_ID_TO_NAME.get(i, f"UNKNOWN_{i}") for i in range(128))
+# "<HEX15> <CommandName>" start of a decoded record line, indexed by byte15
+_RECORD_PREFIX = tuple(f"{b:02X} {CMD_NAMES[b & 0x7F]}" for b in range(256))
+
 # SysMem field (offset, dtype, optional transform function)
 # dtype is one of: "int8","int16","int32","float32","str[N]" or "bitX"
 sysmem_field_map = {
@@ -108,169 +114,262 @@ sysmem_field_map = {
 for i in range(8):
     sysmem_field_map[f"O{i+1}"] = (83, f"bit{i}")
 
+# 16-byte record layout, as two overlapping views: the float32 slots at 0/4/8,
+# and the int16 slots at 0/2/8/10/12 followed by byte14 and byte15
+_REC_FLOATS = struct.Struct("<fff4x")
+_REC_INTS   = struct.Struct("<hh4xhhhBB")
+# ...and as two little-endian 64-bit words, for the padding test
+_REC_QWORDS = struct.Struct("<QQ")
+_PADDING_QWORDS = (0, 0xFF << 56)
+# A padding record always decodes to the same line
+_PADDING_LINE = f"{'FF Padding'.ljust(RAW_COLUMN - 2)} # raw: {'00' * 15}FF\n"
+
+# Record text line: "<HEX15> <CommandName> [param1 param2 ...]"
+_RECORD_LINE_RE = re.compile(r"\s*([0-9A-Fa-f]{2})\s+(\S.*)")
+
+# Precompiled single-field formats
+_F = struct.Struct("<f")
+_H = struct.Struct("<h")
+_B = struct.Struct("<b")
+_I = struct.Struct("<i")
+_UH = struct.Struct("<H")
+
+
+def _format_float(p: float) -> str:
+    """
+    Format a float parameter for display: values within 1e-6 of an integer
+    are printed as that integer, everything else as "%.6g".
+    """
+    r = round(p)
+    if -1e-6 < p - r < 1e-6:
+        return str(r)
+    return f"{p:.6g}"
+
+
+# Per-command parameter codecs.
+#
+# A decoder takes the unpacked record fields (f0/f4/f8 = float32 at offsets
+# 0/4/8, i0/i2/i8/i10/i12 = int16 at those offsets, b14 = byte 14) and returns
+# the displayed parameters, already formatted (_format_float for float slots,
+# str for int slots).  An encoder packs the parsed parameter values
+# `v` back into the zeroed 16-byte record buffer `b`, writing all of its
+# fields with one precompiled Struct call.
+
+def _dec_none(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return []
+
+def _enc_none(b, v):
+    pass
+
+def _dec_i12(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return [str(i12)]
+
+def _enc_i12(b, v):
+    _H.pack_into(b, 12, int(v[0]))
+
+def _dec_b14(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return [str(b14)]
+
+def _enc_b14(b, v):
+    b[14] = int(v[0])
+
+def _dec_f0(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return [_format_float(f0)]
+
+def _enc_f0(b, v):
+    _F.pack_into(b, 0, float(v[0]))
+
+def _dec_f0_b14(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return [_format_float(f0), str(b14)]
+
+_PACK_F0_B14 = struct.Struct("<f10xB")
+
+def _enc_f0_b14(b, v):
+    _PACK_F0_B14.pack_into(b, 0, float(v[0]), int(v[1]))
+
+def _dec_f0_f4(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return [_format_float(f0), _format_float(f4)]
+
+_PACK_F0_F4 = struct.Struct("<ff")
+
+def _enc_f0_f4(b, v):
+    _PACK_F0_F4.pack_into(b, 0, float(v[0]), float(v[1]))
+
+def _dec_f0_f4_f8(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return [_format_float(f0), _format_float(f4), _format_float(f8)]
+
+_PACK_F0_F4_F8 = struct.Struct("<fff")
+
+def _enc_f0_f4_f8(b, v):
+    _PACK_F0_F4_F8.pack_into(b, 0, float(v[0]), float(v[1]), float(v[2]))
+
+def _dec_f0_f4_f8_i12(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return [_format_float(f0), _format_float(f4), _format_float(f8), str(i12)]
+
+_PACK_F0_F4_F8_I12 = struct.Struct("<fffh")
+
+def _enc_f0_f4_f8_i12(b, v):
+    _PACK_F0_F4_F8_I12.pack_into(b, 0, float(v[0]), float(v[1]), float(v[2]), int(v[3]))
+
+def _dec_f0_f4_f8_i12_centi(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return [_format_float(f0), _format_float(f4), _format_float(f8),
+            _format_float(i12 / 100.0)]
+
+def _enc_f0_f4_f8_i12_centi(b, v):
+    _PACK_F0_F4_F8_I12.pack_into(
+        b, 0, float(v[0]), float(v[1]), float(v[2]), int(round(v[3] * 100))
+    )
+
+def _dec_i8_i10(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return [str(i8), str(i10)]
+
+_PACK_I8_I10 = struct.Struct("<hh")
+
+def _enc_i8_i10(b, v):
+    _PACK_I8_I10.pack_into(b, 8, int(v[0]), int(v[1]))
+
+def _dec_i8_i10_i12(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return [str(i8), str(i10), str(i12)]
+
+_PACK_I8_I10_I12 = struct.Struct("<hhh")
+
+def _enc_i8_i10_i12(b, v):
+    _PACK_I8_I10_I12.pack_into(b, 8, int(v[0]), int(v[1]), int(v[2]))
+
+def _dec_loop_address(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return [str(i12), _format_float(f0)]
+
+_PACK_F0_I12 = struct.Struct("<f8xh")
+
+def _enc_loop_address(b, v):
+    _PACK_F0_I12.pack_into(b, 0, float(v[1]), int(v[0]))
+
+def _dec_brush_area(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    # displayed as byte[14] + 1
+    return [_format_float(f0), _format_float(f4), str(b14 + 1), str(i12)]
+
+_PACK_F0_F4_I12_B14 = struct.Struct("<ff4xhB")
+
+def _enc_brush_area(b, v):
+    _PACK_F0_F4_I12_B14.pack_into(b, 0, float(v[0]), float(v[1]), int(v[3]), int(v[2]) - 1)
+
+def _dec_line_dispense_setup(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return [_format_float(f0), _format_float(i10 / 1000.0), _format_float(f4),
+            _format_float(i12 / 1000.0), _format_float(i8 / 1000.0)]
+
+_PACK_F0_F4_I8_I10_I12 = struct.Struct("<ffhhh")
+
+def _enc_line_dispense_setup(b, v):
+    _PACK_F0_F4_I8_I10_I12.pack_into(
+        b, 0, float(v[0]), float(v[2]),
+        int(round(v[4] * 1000)), int(round(v[1] * 1000)), int(round(v[3] * 1000))
+    )
+
+def _dec_step_repeat(f0, f4, f8, i0, i2, i8, i10, i12, b14):
+    return [_format_float(i0 / 100.0), _format_float(i2 / 100.0),
+            str(i10), str(i12), str(b14), str(i8)]
+
+_PACK_I0_I2_I8_I10_I12_B14 = struct.Struct("<hh4xhhhB")
+
+def _enc_step_repeat(b, v):
+    _PACK_I0_I2_I8_I10_I12_B14.pack_into(
+        b, 0, int(round(v[0] * 100)), int(round(v[1] * 100)),
+        int(v[5]), int(v[2]), int(v[3]), int(v[4])
+    )
+
+
+# cmd_id → decoder / encoder; cmd_ids not listed have no parameters
+_DECODERS = [_dec_none] * 128
+_ENCODERS = [_enc_none] * 128
+for _ids, _dec, _enc in (
+    ((54, 27, 30, 40), _dec_i12,                 _enc_i12),
+    ((1, 22),          _dec_f0_b14,              _enc_f0_b14),
+    ((9, 71),          _dec_f0,                  _enc_f0),
+    ((33, 76),         _dec_b14,                 _enc_b14),
+    ((6, 53),          _dec_f0_f4,               _enc_f0_f4),
+    ((68, 23, 2, 3, 4, 5, 12, 18, 31, 55, 67, 72, 73, 74, 75),
+                       _dec_f0_f4_f8,            _enc_f0_f4_f8),
+    ((36,),            _dec_loop_address,        _enc_loop_address),
+    ((28,),            _dec_brush_area,          _enc_brush_area),
+    ((70, 69),         _dec_i8_i10,              _enc_i8_i10),
+    ((7, 43),          _dec_i8_i10_i12,          _enc_i8_i10_i12),
+    ((66, 37),         _dec_f0_f4_f8_i12_centi,  _enc_f0_f4_f8_i12_centi),
+    ((21,),            _dec_line_dispense_setup, _enc_line_dispense_setup),
+    ((29, 38),         _dec_f0_f4_f8_i12,        _enc_f0_f4_f8_i12),
+    ((13, 32),         _dec_step_repeat,         _enc_step_repeat),
+):
+    for _cid in _ids:
+        _DECODERS[_cid] = _dec
+        _ENCODERS[_cid] = _enc
+
 
 def decode_command_records(
     data: bytes,
-    lines: list,
-    include_sysmem: bool = True
+    out: TextIO,
+    include_sysmem: bool = True,
+    max_records: int = None
 ) -> bytes:
     """
-    Decode the first part of `data` in 16-byte records, appending human-readable
-    lines (with inline “# raw:” hex) to `lines`. If include_sysmem is True
+    Decode the first part of `data` in 16-byte records, writing human-readable
+    lines (with inline “# raw:” hex) to the text stream `out`. If include_sysmem is True
     and `data` is at least 400 bytes long, the last 400 bytes are treated
     as SysMem and returned; otherwise returns b''.
+    If max_records is given, only that many records are written after the
+    "# n records" header (which still counts them all).
     """
-    # Split off SysMem if requested
-    if include_sysmem and len(data) >= 400:
-        body   = data[:-400]
-        sysmem = data[-400:]
+    # Split off SysMem if requested; slicing a memoryview doesn't copy the body
+    view = memoryview(data)
+    if include_sysmem and len(view) >= 400:
+        body   = view[:-400]
+        sysmem = bytes(view[-400:])
     else:
-        body   = data
+        body   = view
         sysmem = b""
 
     n_recs = len(body) // 16
-    lines.append(f"# {n_recs} records")
-
+    out.write(f"# {n_recs} records\n")
+
+    # Keep only the whole records to be written (at most max_records of them)
+    if max_records is not None:
+        n_recs = min(n_recs, max_records)
+    body = body[: n_recs * 16]
+    # Hex-encode the whole body once; each record's "# raw:" text is a slice of it
+    all_hex = body.hex().upper()
     offset = 0
-    for _ in range(n_recs):
-        rec = body[offset : offset + 16]
-        offset += 16
-
-        # Padding check: first 15 bytes = 0x00, last byte = 0xFF
-        if rec[:15] == b"\x00" * 15 and rec[15] == 0xFF:
-            left_part = "FF Padding"
-            raw_hex = rec.hex().upper()
-            spaces_needed = max(1, RAW_COLUMN - len(left_part) - 1)
-            lines.append(left_part + (" " * spaces_needed) + f"# raw: {raw_hex}")
+    # Unpack every record's parameter slots as we go, one C-level pass per layout
+    for (f0, f4, f8), (i0, i2, i8, i10, i12, b14, byte15) in zip(
+        _REC_FLOATS.iter_unpack(body), _REC_INTS.iter_unpack(body)
+    ):
+        # Padding check: first 15 bytes = 0x00, last byte = 0xFF, tested as two
+        # 64-bit words once the cheap byte15 test has already passed
+        if byte15 == 0xFF and _REC_QWORDS.unpack_from(body, offset) == _PADDING_QWORDS:
+            offset += 16
+            out.write(_PADDING_LINE)
             continue
 
-        byte15 = rec[15]
-        cmd_id = byte15 & 0x7F
-        name = CMD_ID_TO_NAME.get(cmd_id, f"UNKNOWN_{cmd_id}")
-
-        # Unpack parameters
-        params = []
-        def rf(o): return struct.unpack_from("<f", rec, o)[0]
-        def ri(o): return struct.unpack_from("<h", rec, o)[0]
-
-        if cmd_id == 54:
-            params.append(ri(12))
-        elif cmd_id == 1:
-            params.append(rf(0))
-            params.append(rec[14])
-        elif cmd_id in (9, 71):
-            params.append(rf(0))
-        elif cmd_id in (27, 30, 40):
-            params.append(ri(12))
-        elif cmd_id in (33, 76):
-            params.append(rec[14])
-        elif cmd_id == 22:
-            params.append(rf(0))
-            params.append(rec[14])
-        elif cmd_id in (6, 53):
-            params.append(rf(0))
-            params.append(rf(4))
-        elif cmd_id == 68:
-            params.append(rf(0))
-            params.append(rf(4))
-            params.append(rf(8))
-        elif cmd_id == 36:
-            params.append(ri(12))
-            params.append(rf(0))
-        elif cmd_id == 28:
-            params.append(rf(0))
-            params.append(rf(4))
-            # displayed as byte[14] + 1
-            params.append(rec[14] + 1)
-            params.append(ri(12))
-        elif cmd_id == 70:
-            params.append(ri(8))
-            params.append(ri(10))
-        elif cmd_id in (7, 43):
-            params.append(ri(8))
-            params.append(ri(10))
-            params.append(ri(12))
-        elif cmd_id == 69:
-            params.append(ri(8))
-            params.append(ri(10))
-        elif cmd_id == 23:
-            params.append(rf(0))
-            params.append(rf(4))
-            params.append(rf(8))
-        elif cmd_id in (2, 3, 4, 5, 12, 18, 31, 55, 67, 72, 73, 74, 75):
-            params.append(rf(0))
-            params.append(rf(4))
-            params.append(rf(8))
-        elif cmd_id == 66:
-            params.append(rf(0))
-            params.append(rf(4))
-            params.append(rf(8))
-            params.append(ri(12) / 100.0)
-        elif cmd_id == 21:
-            params.append(rf(0))
-            params.append(ri(10) / 1000.0)
-            params.append(rf(4))
-            params.append(ri(12) / 1000.0)
-            params.append(ri(8) / 1000.0)
-        elif cmd_id == 37:
-            params.append(rf(0))
-            params.append(rf(4))
-            params.append(rf(8))
-            params.append(ri(12) / 100.0)
-        elif cmd_id in (29, 38):
-            params.append(rf(0))
-            params.append(rf(4))
-            params.append(rf(8))
-            params.append(ri(12))
-        elif cmd_id in (13, 32):
-            params.append(ri(0) / 100.0)
-            params.append(ri(2) / 100.0)
-            params.append(ri(10))
-            params.append(ri(12))
-            params.append(rec[14])
-            params.append(ri(8))
-        # else: no parameters
+        raw_hex = all_hex[2 * offset : 2 * offset + 32]
+        offset += 16
+
+        # Collect the formatted parameters via the per-command decoder
+        params = _DECODERS[byte15 & 0x7F](f0, f4, f8, i0, i2, i8, i10, i12, b14)
 
         if params:
-            outp = []
-            for p in params:
-                if isinstance(p, float):
-                    if abs(p - round(p)) < 1e-6:
-                        outp.append(str(int(round(p)))
-)
-                    else:
-                        outp.append(f"{p:.6g}")
-                else:
-                    outp.append(str(p))
-            left_part = f"{byte15:02X} {name} {' '.join(outp)}"
+            left_part = f"{_RECORD_PREFIX[byte15]} {' '.join(params)}"
         else:
-            left_part = f"{byte15:02X} {name}"
+            left_part = _RECORD_PREFIX[byte15]
 
-        raw_hex = rec.hex().upper()
-        spaces_needed = max(1, RAW_COLUMN - len(left_part) - 1)
-        lines.append(left_part + (" " * spaces_needed) + f"# raw: {raw_hex}")
+        # Pad so "# raw:" starts at RAW_COLUMN, keeping at least one space
+        out.write(f"{left_part.ljust(RAW_COLUMN - 2)} # raw: {raw_hex}\n")
 
     return sysmem
 
 
 
-def decode_sysmem_pretty(sysmem: bytes, lines: list, raw_column=RAW_COLUMN):
+def decode_sysmem_pretty(sysmem: bytes, out: TextIO, raw_column=RAW_COLUMN):
     """
     Print each mapped SysMem field as its own entry (Field: value    # raw: <hex>).
     Then print a final "unmapped raw" 400-byte block so encoding can preserve those bytes exactly.
     """
-    def get_int(offset, size):
-        if size == 1:
-            return struct.unpack_from("<b", sysmem, offset)[0]
-        if size == 2:
-            return struct.unpack_from("<h", sysmem, offset)[0]
-        if size == 4:
-            return struct.unpack_from("<i", sysmem, offset)[0]
-        raise ValueError("Unsupported int size")
-
-    def get_float(offset):
-        return struct.unpack_from("<f", sysmem, offset)[0]
-
     def get_string(offset, length):
         raw = sysmem[offset:offset + length]
         if b"\x00" in raw:
@@ -280,14 +379,15 @@ def decode_sysmem_pretty(sysmem: bytes, lines: list, raw_column=RAW_COLUMN):
         except:
             return "<invalid>"
 
+    # Hex-encode the block once, space-separated ("XX XX ..."); the unmapped
+    # dump slices it into rows, and field raws drop the separators
+    flat = sysmem.hex(" ").upper()
+
     def get_raw(offset, size):
-        return sysmem[offset : offset + size].hex().upper()
+        return flat[3 * offset : 3 * (offset + size) - 1].replace(" ", "")
 
     # Emit header for decoded fields
-    lines.append("===== SysMem (decoded fields) =====")
-
-    # Track which offsets have been covered by mapped fields
-    covered = set()
+    out.write("===== SysMem (decoded fields) =====\n")
 
     for field, info in sysmem_field_map.items():
         offset, dtype = info[0], info[1]
@@ -298,30 +398,25 @@ def decode_sysmem_pretty(sysmem: bytes, lines: list, raw_column=RAW_COLUMN):
             continue
 
         if dtype == "int8":
-            val = get_int(offset, 1)
+            val = _B.unpack_from(sysmem, offset)[0]
             raw = get_raw(offset, 1)
-            covered.update(range(offset, offset+1))
 
         elif dtype == "int16":
-            val = get_int(offset, 2)
+            val = _H.unpack_from(sysmem, offset)[0]
             raw = get_raw(offset, 2)
-            covered.update(range(offset, offset+2))
 
         elif dtype == "int32":
-            val = get_int(offset, 4)
+            val = _I.unpack_from(sysmem, offset)[0]
             raw = get_raw(offset, 4)
-            covered.update(range(offset, offset+4))
 
         elif dtype == "float32":
-            val = get_float(offset)
+            val = _F.unpack_from(sysmem, offset)[0]
             raw = get_raw(offset, 4)
-            covered.update(range(offset, offset+4))
 
         elif dtype.startswith("str["):
             length = int(dtype[4:-1])
             val = get_string(offset, length)
             raw = get_raw(offset, length)
-            covered.update(range(offset, offset+length))
 
         else:
             # unknown dtype (should not happen (famous last words))
@@ -340,58 +435,62 @@ def decode_sysmem_pretty(sysmem: bytes, lines: list, raw_column=RAW_COLUMN):
 
         text = f"{field}: {val}"
         pad = max(1, RAW_COLUMN - len(text) - 1)
-        lines.append(text + (" " * pad) + f"# raw: {raw}")
+        out.write(text + (" " * pad) + f"# raw: {raw}\n")
 
     # Emit O1–O8 bits (packed in 2-byte int at offset 83)
-    oflags = struct.unpack_from("<H", sysmem, 83)[0]
-    covered.update([83, 84])  # those two bytes used by all O1–O8
-
-    for i in range(8):
-        bit = (oflags >> i) & 1
-        text = f"O{i+1}: {bool(bit)}"
-        pad = max(1, RAW_COLUMN - len(text) - 1)
-        lines.append(text + (" " * pad) + f"# raw: {(oflags & 0xFFFF):04X}")
+    oflags = _UH.unpack_from(sysmem, 83)[0]
 
-    # Emit a final raw block for any offsets not covered above,
-    # so that encoding can preserve them exactly.
-    lines.append("===== SysMem (unmapped raw) =====")
-    # Print 20 bytes per line, from byte 0..399
-    for i in range(0, 400, 20):
-        slab = sysmem[i : i + 20]
-        hex_vals = " ".join(f"{b:02X}" for b in slab)
-        lines.append(hex_vals)
+    # All eight lines share the same raw; the labels are short enough that
+    # ljust always leaves at least one space before "# raw:"
+    raw_tail = f"# raw: {oflags:04X}\n"
+    out.write("".join([
+        f"O{i+1}: {bool((oflags >> i) & 1)}".ljust(RAW_COLUMN - 1) + raw_tail
+        for i in range(8)
+    ]))
 
+    # Emit a final raw block of all 400 bytes, so that encoding can
+    # preserve the unmapped ones exactly.
+    out.write("===== SysMem (unmapped raw) =====\n")
+    # Print 20 bytes per line, from byte 0..399: each row is a 59-char slice
+    # of `flat` (20 bytes * 3 chars, less the last space)
+    out.write("".join([flat[i : i + 59] + "\n" for i in range(0, 1200, 60)]))
 
-def encode_sysmem_from_fields(lines: list, start_idx: int):
 
+def encode_sysmem_from_fields(lines: list):
+    """
+    Re-encode the "Field: value" lines that follow the
+    "===== SysMem (decoded fields)" header into a zeroed 400-byte buffer.
+    """
     sysmem = bytearray(400)
     bitfields = {}
 
-    for idx in range(start_idx + 1, len(lines)):
-        line = lines[idx].strip()
-        if not line or line.startswith("====="):
-            break
-        if ":" not in line:
-            continue
-
-        field, value = map(str.strip, line.split(":", 1))
-
-        # If #raw comment is in place, skip and just copy from unmapped block
-        if "# raw:" in line:
-            continue
-
-        # Otherwise, re-encode
-        if field not in sysmem_field_map:
-            continue
-
-        offset, dtype = sysmem_field_map[field][:2]
-        transform = (
-            sysmem_field_map[field][2]
-            if len(sysmem_field_map[field]) > 2
-            else (lambda v: v)
-        )
+    # One handler for the whole loop; `field` names the line being encoded
+    field = None
+    try:
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("====="):
+                break
+            if ":" not in line:
+                continue
+
+            field, value = map(str.strip, line.split(":", 1))
+
+            # If #raw comment is in place, skip and just copy from unmapped block
+            if "# raw:" in line:
+                continue
+
+            # Otherwise, re-encode
+            if field not in sysmem_field_map:
+                continue
+
+            offset, dtype = sysmem_field_map[field][:2]
+            transform = (
+                sysmem_field_map[field][2]
+                if len(sysmem_field_map[field]) > 2
+                else (lambda v: v)
+            )
 
-        try:
             if dtype.startswith("bit"):
                 bit = int(dtype[3:])
                 val = value.lower() in ("1", "true", "yes")
@@ -403,25 +502,25 @@ def encode_sysmem_from_fields(lines: list, start_idx: int):
                 sysmem[offset] = transform(value) & 0xFF
 
             elif dtype == "int16":
-                struct.pack_into("<h", sysmem, offset, transform(int(value)))
+                _H.pack_into(sysmem, offset, transform(int(value)))
 
             elif dtype == "int32":
-                struct.pack_into("<i", sysmem, offset, transform(int(value)))
+                _I.pack_into(sysmem, offset, transform(int(value)))
 
             elif dtype == "float32":
-                struct.pack_into("<f", sysmem, offset, float(value))
+                _F.pack_into(sysmem, offset, float(value))
 
             elif dtype.startswith("str["):
                 length = int(dtype[4:-1])
                 encoded = value.encode("ascii", errors="ignore")[:length]
                 sysmem[offset : offset + length] = encoded + b"\x00" * (length - len(encoded))
 
-        except Exception as e:
-            raise ValueError(f"Error encoding field '{field}': {e}")
+    except Exception as e:
+        raise ValueError(f"Error encoding field '{field}': {e}")
 
     # Write collected bitfields (O1..O8)
     for offset, bits in bitfields.items():
-        struct.pack_into("<H", sysmem, offset, bits)
+        _UH.pack_into(sysmem, offset, bits)
 
     return bytes(sysmem)
 
@@ -432,20 +531,22 @@ def _pack_record_from_text(text_part: str, original_line: str) -> bytes:
       "<HEX15> <CommandName> [param1 param2 ...]"
     parse tokens and pack into a 16-byte record.
     """
-    tokens = text_part.split()
-    if len(tokens) < 2:
-        raise ValueError(f"Invalid record line (too few tokens): '{original_line}'")
-
-    hex15 = tokens[0]
-    if len(hex15) != 2:
-        raise ValueError(
-            f"Expected two-digit hex for byte15, got '{hex15}' in line: '{original_line}'"
-        )
-    try:
-        byte15 = int(hex15, 16)
-    except ValueError:
+    m = _RECORD_LINE_RE.match(text_part)
+    if m is None:
+        # Work out which part of the line is malformed
+        tokens = text_part.split()
+        if len(tokens) < 2:
+            raise ValueError(f"Invalid record line (too few tokens): '{original_line}'")
+        hex15 = tokens[0]
+        if len(hex15) != 2:
+            raise ValueError(
+                f"Expected two-digit hex for byte15, got '{hex15}' in line: '{original_line}'"
+            )
         raise ValueError(f"Invalid hex '{hex15}' in line: '{original_line}'")
 
+    hex15, rest = m.groups()
+    byte15 = int(hex15, 16)
+
     # Padding line if byte15 == 0xFF
     if byte15 == 0xFF:
         return b"\x00" * 15 + b"\xFF"
@@ -458,16 +559,13 @@ def _pack_record_from_text(text_part: str, original_line: str) -> bytes:
     name_tokens = []
     param_tokens = []
     seen_param = False
-    for tok in tokens[1:]:
-        if not seen_param:
-            try:
-                _ = float(tok)
-                seen_param = True
-                param_tokens.append(tok)
-            except ValueError:
-                name_tokens.append(tok)
-        else:
+    for tok in rest.split():
+        # Parameters start at the first token that begins like a number
+        seen_param = seen_param or tok[0] in "+-.0123456789"
+        if seen_param:
             param_tokens.append(tok)
+        else:
+            name_tokens.append(tok)
 
     # Convert param_tokens into numeric list
     val_list = []
@@ -483,175 +581,52 @@ def _pack_record_from_text(text_part: str, original_line: str) -> bytes:
             except ValueError:
                 raise ValueError(f"Cannot parse '{p}' as int in line: '{original_line}'")
 
-    cmd_id = byte15 & 0x7F
-    vi = 0  # index into val_list
-
     # Now pack fields according to cmd_id
-    if cmd_id == 54:
-        p = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 12, p)
-
-    elif cmd_id == 1:
-        f0 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 0, f0)
-        p1 = int(val_list[vi]); vi += 1
-        bcar[14] = p1
-
-    elif cmd_id in (9, 71):
-        f0 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 0, f0)
-
-    elif cmd_id in (27, 30, 40):
-        p = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 12, p)
-
-    elif cmd_id in (33, 76):
-        p = int(val_list[vi]); vi += 1
-        bcar[14] = p
-
-    elif cmd_id == 22:
-        f0 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 0, f0)
-        p1 = int(val_list[vi]); vi += 1
-        bcar[14] = p1
-
-    elif cmd_id in (6, 53):
-        f0 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 0, f0)
-        f1 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 4, f1)
-
-    elif cmd_id == 68:
-        f0 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 0, f0)
-        f1 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 4, f1)
-        f2 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 8, f2)
-
-    elif cmd_id == 36:
-        p = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 12, p)
-        f0 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 0, f0)
-
-    elif cmd_id == 28:
-        f0 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 0, f0)
-        f1 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 4, f1)
-        p2 = int(val_list[vi]); vi += 1
-        bcar[14] = p2 - 1
-        p3 = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 12, p3)
-
-    elif cmd_id == 70:
-        p = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 8, p)
-        p2 = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 10, p2)
-
-    elif cmd_id in (7, 43):
-        p = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 8, p)
-        p2 = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 10, p2)
-        p3 = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 12, p3)
-
-    elif cmd_id == 69:
-        p = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 8, p)
-        p2 = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 10, p2)
-
-    elif cmd_id == 23:
-        f0 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 0, f0)
-        f1 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 4, f1)
-        f2 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 8, f2)
-
-    elif cmd_id in (2, 3, 4, 5, 12, 18, 31, 55, 67, 72, 73, 74, 75):
-        f0 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 0, f0)
-        f1 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 4, f1)
-        f2 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 8, f2)
-
-    elif cmd_id == 66:
-        f0 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 0, f0)
-        f1 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 4, f1)
-        f2 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 8, f2)
-        p3 = int(round(val_list[vi] * 100)); vi += 1
-        struct.pack_into("<h", bcar, 12, p3)
-
-    elif cmd_id == 21:
-        f0 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 0, f0)
-        p2 = int(round(val_list[vi] * 1000)); vi += 1
-        struct.pack_into("<h", bcar, 10, p2)
-        f1 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 4, f1)
-        p4 = int(round(val_list[vi] * 1000)); vi += 1
-        struct.pack_into("<h", bcar, 12, p4)
-        p5 = int(round(val_list[vi] * 1000)); vi += 1
-        struct.pack_into("<h", bcar, 8, p5)
-
-    elif cmd_id == 37:
-        f0 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 0, f0)
-        f1 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 4, f1)
-        f2 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 8, f2)
-        p4 = int(round(val_list[vi] * 100)); vi += 1
-        struct.pack_into("<h", bcar, 12, p4)
-
-    elif cmd_id in (29, 38):
-        f0 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 0, f0)
-        f1 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 4, f1)
-        f2 = float(val_list[vi]); vi += 1
-        struct.pack_into("<f", bcar, 8, f2)
-        p3 = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 12, p3)
-
-    elif cmd_id in (13, 32):
-        p1 = int(round(val_list[vi] * 100)); vi += 1
-        struct.pack_into("<h", bcar, 0, p1)
-        p2 = int(round(val_list[vi] * 100)); vi += 1
-        struct.pack_into("<h", bcar, 2, p2)
-        p3 = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 10, p3)
-        p4 = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 12, p4)
-        p5 = int(val_list[vi]); vi += 1
-        bcar[14] = p5
-        p6 = int(val_list[vi]); vi += 1
-        struct.pack_into("<h", bcar, 8, p6)
+    _ENCODERS[byte15 & 0x7F](bcar, val_list)
 
     return bytes(bcar)
 
 
-def encode_records_from_text(lines: list):
- 
+def encode_records_from_text(lines) -> bytearray:
+    """
+    Pack record lines taken from the iterable `lines` (e.g. an open file),
+    stopping after the "===== SysMem (decoded fields)" header or at the end
+    of input. Returns the packed records.
+    Lines split on universal newlines only, as file iteration does; separators
+    such as \\x1c or \\u2028 that str.splitlines() would also break on stay
+    inside the line.
+    """
     recs = bytearray()
-    idx = 0
+    # Hex of consecutive "# raw:" records, decoded together in one fromhex call,
+    # and the lines they came from, for error messages
+    raw_run = []
+    raw_lines = []
 
-    while idx < len(lines):
-        ln = lines[idx].rstrip("\n")
+    def flush_raw_run():
+        try:
+            run = bytes.fromhex("".join(raw_run))
+        except ValueError:
+            run = b""
+        if len(run) != 16 * len(raw_run):
+            # A bad pair, or whitespace inside the hex that fromhex skipped:
+            # decode record by record so the error names the offending line
+            for raw_hex, raw_ln in zip(raw_run, raw_lines):
+                try:
+                    rec = bytes.fromhex(raw_hex)
+                except ValueError as e:
+                    raise ValueError(f"Invalid raw hex '{raw_hex}' ({e}) in line: '{raw_ln}'")
+                if len(rec) != 16:
+                    raise ValueError(f"Raw hex did not decode to 16 bytes: '{raw_ln}'")
+        recs.extend(run)
+        raw_run.clear()
+        raw_lines.clear()
+
+    for ln in lines:
+        ln = ln.rstrip("\n")
         strip_ln = ln.strip()
 
         # Skip blanks or comments
         if not strip_ln or strip_ln.startswith("#"):
-            idx += 1
             continue
 
         # Stop at SysMem section
@@ -664,78 +639,94 @@ def encode_records_from_text(lines: list):
             raw_hex = raw_part.strip().replace(" ", "")
             if len(raw_hex) != 32:
                 raise ValueError(f"Expected 32 hex chars after '# raw:', got '{raw_hex}'")
-            rec = bytes.fromhex(raw_hex)
-            if len(rec) != 16:
-                raise ValueError(f"Raw hex did not decode to 16 bytes: '{ln}'")
-            recs.extend(rec)
+            raw_run.append(raw_hex)
+            raw_lines.append(ln)
+            if len(raw_run) >= 4096:
+                flush_raw_run()
         else:
             # No raw, re-pack from text
-            rec = _pack_record_from_text(ln, ln)
-            recs.extend(rec)
-
-        idx += 1
+            if raw_run:
+                flush_raw_run()
+            recs.extend(_pack_record_from_text(ln, ln))
 
-    return recs, idx
+    if raw_run:
+        flush_raw_run()
+    return recs
 
 
-def parse_unmapped_raw(lines: list, start_idx: int):
+def parse_unmapped_raw(lines) -> bytes:
     """
-    Starting below '===== SysMem (unmapped raw) =====', read next 400 raw bytes (20 per line).
-    Returns (bytes_of_400, next_index).
+    Read the 400 raw bytes (20 per line) that follow the
+    '===== SysMem (unmapped raw) =====' header, consuming them from the
+    iterator `lines`. Each whitespace-separated token is one byte in base 16;
+    hand-edited tokens such as "5" or "0x12" are accepted as well.
     """
-    idx = start_idx + 1
-    hex_bytes = []
+    raw = bytearray()
 
-    while idx < len(lines):
-        ln = lines[idx].strip()
+    for ln in lines:
+        ln = ln.strip()
         if not ln:
-            idx += 1
             continue
         if ln.startswith("====="):
             break
-        parts = ln.split()
-        for h in parts:
-            if len(hex_bytes) < 400:
-                hex_bytes.append(int(h, 16))
-        idx += 1
-        if len(hex_bytes) >= 400:
+        # Tokens past the 400th byte are ignored, not parsed
+        tokens = ln.split()[: 400 - len(raw)]
+        chunk = "".join(tokens)
+        try:
+            # Common case: every token is two hex digits, decoded in one call
+            if len(chunk) != 2 * len(tokens):
+                raise ValueError
+            raw += bytes.fromhex(chunk)
+        except ValueError:
+            try:
+                raw += bytes([int(h, 16) for h in tokens])
+            except ValueError as e:
+                raise ValueError(f"Invalid unmapped SysMem byte ({e}) in line: '{ln}'")
+        if len(raw) >= 400:
             break
 
-    if len(hex_bytes) < 400:
+    if len(raw) < 400:
         raise ValueError("Could not parse 400 bytes of unmapped SysMem.")
-    return bytes(hex_bytes[:400]), idx
+    return bytes(raw)
 
 
 def encode_file(infile: str, outfile: str):
   
-    all_lines = open(infile, "r", encoding="utf-8").read().splitlines()
-
-    # Re‐pack all 16‐byte records
-    recs, idx = encode_records_from_text(all_lines)
-
-    # Identify which fields lost “# raw:”
-    to_reencode = set()
     header_unmapped = "===== SysMem (unmapped raw) ====="
-    i = idx
-    while i < len(all_lines):
-        line = all_lines[i].strip()
-        if line.startswith(header_unmapped):
-            break
-        if ":" in line and "# raw:" not in line:
-            field_name = line.split(":", 1)[0].strip()
-            if field_name in sysmem_field_map:
-                to_reencode.add(field_name)
-        i += 1
+    with open(infile, "r", encoding="utf-8") as fin:
+        # Re‐pack all 16‐byte records, streaming them from the file
+        recs = encode_records_from_text(fin)
+
+        # Walk the rest of the file once: gather the decoded-field lines and
+        # note which fields lost “# raw:”, up to the unmapped-raw header
+        field_lines = []
+        fields_ended = False
+        to_reencode = set()
+        found_unmapped = False
+        for ln in fin:
+            ln = ln.rstrip("\n")
+            if ln == header_unmapped:
+                found_unmapped = True
+                break
+            line = ln.strip()
+            # the decoded fields end at the first blank or "=====" line
+            if not fields_ended:
+                if not line or line.startswith("====="):
+                    fields_ended = True
+                else:
+                    field_lines.append(line)
+            if ":" in line and "# raw:" not in line:
+                field_name = line.split(":", 1)[0].strip()
+                if field_name in sysmem_field_map:
+                    to_reencode.add(field_name)
 
-    # Re‐encode only those fields into zeroed 400‐byte “mapped_buffer”
-    mapped_buffer = encode_sysmem_from_fields(all_lines, idx)
+        # Re‐encode only those fields into zeroed 400‐byte “mapped_buffer”
+        mapped_buffer = encode_sysmem_from_fields(field_lines)
 
-    # Parse the full 400 bytes of “unmapped raw”
-    try:
-        idx_unmapped = all_lines.index(header_unmapped)
-    except ValueError:
-        raise ValueError("Could not find '===== SysMem (unmapped raw) =====' in the decoded file.")
-    unmapped_base, _ = parse_unmapped_raw(all_lines, idx_unmapped)
+        # Parse the full 400 bytes of “unmapped raw” from the lines below the header
+        if not found_unmapped:
+            raise ValueError("Could not find '===== SysMem (unmapped raw) =====' in the decoded file.")
+        unmapped_base = parse_unmapped_raw(fin)
 
     # Overlay only those offsets whose field lost “# raw:”
     final_sysmem = bytearray(unmapped_base)
@@ -762,6 +753,71 @@ def encode_file(infile: str, outfile: str):
     print(f"Encoded {infile} → {outfile}")
 
 
+@contextmanager
+def _map_file(path: str):
+    """
+    Yield a read-only mmap of `path` if it is a non-empty regular file.
+    Anything else (an empty file, or a pipe, FIFO or /dev/stdin, which all
+    report size 0) can't be mapped, so its contents are read instead.
+    """
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if not (stat.S_ISREG(st.st_mode) and st.st_size > 0):
+            yield f.read()
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mm
+        finally:
+            try:
+                mm.close()
+            except BufferError:
+                # A propagating exception's traceback still holds memoryviews
+                # of the map; it is unmapped once those are released.
+                pass
+
+
+@contextmanager
+def _replace_on_success(path: str):
+    """
+    Yield a text stream for `path` that writes to a temporary file in the same
+    directory, moved over `path` only once the block finishes without an
+    exception. A failed decode leaves an existing `path` untouched, and `path`
+    may be the (memory-mapped) input file itself. Outputs that aren't regular
+    files, such as /dev/stdout, are written directly.
+    """
+    # Writes go through a 1 MiB buffer so large files are written in big blocks
+    if os.path.exists(path) and not os.path.isfile(path):
+        with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            yield f
+        return
+
+    # Replace a symlink's target rather than the link itself
+    path = os.path.realpath(path)
+
+    fd, tmp = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", buffering=1 << 20) as f:
+            yield f
+        # mkstemp creates the file 0600; keep the mode the output would have had
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
 def decode_file(
     infile: str,
     outfile: str,
@@ -773,34 +829,33 @@ def decode_file(
      - If >=500 B, tentatively split off last 400 B as SysMem.
      - But if that 400 B contains only 0x00 or 0x13, fold it back into commands.
     """
-    data = open(infile, "rb").read()
-
-    # pure-record file?
-    if len(data) < 500 and len(data) % 16 == 0:
-        include_sysmem = False
-
-    # if big enough, peek at the tail for fake-SysMem
-    if include_sysmem and len(data) >= 400:
-        tail = data[-400:]
-        # if ALL bytes in that tail are 0x00 or 0x13, it's just extra commands
-        if all(b in (0x00, 0x13) for b in tail):
+    # Map the input rather than reading it into memory, and decode into a
+    # temporary file that replaces `outfile` only once decoding has succeeded
+    # (and the map is closed, so `outfile` may name the input)
+    with _replace_on_success(outfile) as fout, _map_file(infile) as data:
+        # pure-record file?
+        if len(data) < 500 and len(data) % 16 == 0:
             include_sysmem = False
 
-    # sanity check
-    if include_sysmem and len(data) < 500:
-        print("Error: file too small for real SysMem decoding (<500 bytes).")
-        sys.exit(1)
+        # if big enough, peek at the tail for fake-SysMem
+        if include_sysmem and len(data) >= 400:
+            tail = data[-400:]
+            # if ALL bytes in that tail are 0x00 or 0x13, it's just extra commands
+            if all(b in (0x00, 0x13) for b in tail):
+                include_sysmem = False
 
-    lines = []
-    # Pass the (possibly updated) flag in
-    sysmem = decode_command_records(data, lines, include_sysmem=include_sysmem)
+        # sanity check
+        if include_sysmem and len(data) < 500:
+            print("Error: file too small for real SysMem decoding (<500 bytes).")
+            sys.exit(1)
 
-    # Only dump a real SysMem if we actually split it off
-    if include_sysmem and sysmem:
-        decode_sysmem_pretty(sysmem, lines)
+        # Stream decoded lines straight into the output; pass the (possibly
+        # updated) flag in
+        sysmem = decode_command_records(data, fout, include_sysmem=include_sysmem)
 
-    with open(outfile, "w", encoding="utf-8") as fout:
-        fout.write("\n".join(lines))
+        # Only dump a real SysMem if we actually split it off
+        if include_sysmem and sysmem:
+            decode_sysmem_pretty(sysmem, fout)
 
     print(f"Decoded {infile} → {outfile}")
 
@@ -810,18 +865,13 @@ def dump_sysmem_to_terminal(infile: str):
     Read the last 400 bytes of infile, decode the named SysMem fields,
     and print them to stdout.
     """
-    data = open(infile, "rb").read()
-    if len(data) < 400:
-        print(f"Error: file too small to contain a 400-byte SysMem block: {infile}")
-        sys.exit(1)
+    with _map_file(infile) as data:
+        if len(data) < 400:
+            print(f"Error: file too small to contain a 400-byte SysMem block: {infile}")
+            sys.exit(1)
 
-    sysmem = data[-400:]
-    lines = []
-    decode_sysmem_pretty(sysmem, lines)   # existing pretty-printer
-
-    # Print each decoded line
-    for line in lines:
-        print(line)
+        sysmem = data[-400:]
+    decode_sysmem_pretty(sysmem, sys.stdout)   # existing pretty-printer
 
 
 def dump_program_to_terminal(infile: str, n_lines: int = None):
@@ -830,19 +880,9 @@ def dump_program_to_terminal(infile: str, n_lines: int = None):
     and print the first `n_lines` of them (including the header).
     If n_lines is None, print the entire program section.
     """
-    data = open(infile, "rb").read()
-    lines = []
-    # Decode commands only (no SysMem)
-    decode_command_records(data, lines, include_sysmem=False)
-
-    # Determine how many lines to print
-    if n_lines is None or n_lines >= len(lines):
-        to_print = lines
-    else:
-        to_print = lines[: n_lines + 1 ]  # +1 to include the "# n records" header
-
-    for line in to_print:
-        print(line)
+    with _map_file(infile) as data:
+        # Decode commands only (no SysMem), and only the records being shown
+        decode_command_records(data, sys.stdout, include_sysmem=False, max_records=n_lines)
 
 
 def summarize_file(infile: str):
@@ -852,48 +892,47 @@ def summarize_file(infile: str):
       • whether a real 400-byte SysMem block was detected
       • ProgramSize, XYMoveSpeed, ZMoveSpeed, O1–O8 (if SysMem)
     """
-    data = open(infile, "rb").read()
+    with _map_file(infile) as data:
+        include_sysmem = True
+        size = len(data)
 
-    include_sysmem = True
-    size = len(data)
-
-    if size < 500 and size % 16 == 0:
-        include_sysmem = False
-    elif size >= 400:
-        tail = data[-400:]
-        if all(b in (0x00, 0x13) for b in tail):
+        if size < 500 and size % 16 == 0:
             include_sysmem = False
+        elif size >= 400:
+            tail = data[-400:]
+            if all(b in (0x00, 0x13) for b in tail):
+                include_sysmem = False
+
+        has_sysmem = include_sysmem and size >= 400
 
-    has_sysmem = include_sysmem and size >= 400
+        # count only “real” commands (exclude 0, 19, 127), reading each
+        # record's byte15 in place rather than slicing the record out
+        body_len = size - 400 if has_sysmem else size
+        total_recs = body_len // 16
+        valid_recs = 0
+        for off in range(15, total_recs * 16, 16):
+            cmd_id = data[off] & 0x7F
+            if cmd_id not in (0, 19, 127):
+                valid_recs += 1
 
-    # count only “real” commands (exclude 0, 19, 127)
-    body = data[:-400] if has_sysmem else data
-    total_recs = len(body) // 16
-    valid_recs = 0
-    for i in range(total_recs):
-        rec = body[i*16:(i+1)*16]
-        cmd_id = rec[15] & 0x7F
-        if cmd_id not in (0, 19, 127):
-            valid_recs += 1
+        sysmem = data[-400:] if has_sysmem else b""
 
     parts = [f"Commands={valid_recs}", f"SysMem={'yes' if has_sysmem else 'no'}"]
 
     # if we really have SysMem, extract key fields
     if has_sysmem:
-        sysmem = data[-400:]
-
         # Helpers to read ints/floats
         def read_int(offset, dtype):
             if dtype == "int8":
-                return struct.unpack_from("<b", sysmem, offset)[0]
+                return _B.unpack_from(sysmem, offset)[0]
             if dtype == "int16":
-                return struct.unpack_from("<h", sysmem, offset)[0]
+                return _H.unpack_from(sysmem, offset)[0]
             if dtype == "int32":
-                return struct.unpack_from("<i", sysmem, offset)[0]
+                return _I.unpack_from(sysmem, offset)[0]
             raise ValueError(f"Unsupported int dtype {dtype}")
 
         def read_float(offset):
-            return struct.unpack_from("<f", sysmem, offset)[0]
+            return _F.unpack_from(sysmem, offset)[0]
 
         # ProgramSize: raw = int32, stored as +1
         offset, dtype = sysmem_field_map["ProgramSize"][:2]
@@ -913,7 +952,7 @@ def summarize_file(infile: str):
         ])
 
         # Flags O1–O8 at offset 83 as uint16 bitfield
-        oflags = struct.unpack_from("<H", sysmem, 83)[0]
+        oflags = _UH.unpack_from(sysmem, 83)[0]
         flags = ",".join(
             f"O{i+1}={'1' if (oflags >> i) & 1 else '0'}"
             for i in range(8)